@@ -1,6 +1,12 @@
 import { NextRequest } from "next/server";
 
-import { retrieveChunks, formatChunksForPrompt } from "../../../lib/rag";
+import {
+  retrieveChunks,
+  formatChunksForPrompt,
+  embedQuery,
+  isSmalltalk,
+  hasKeywordShortcut
+} from "../../../lib/rag";
 import { loadMemory, saveMemory, formatMemoryForPrompt } from "../../../lib/memory";
 
 import {
@@ -9,6 +15,16 @@ import {
 } from "../../../lib/adminMetrics";
 
 import { sendTelegramMessage } from "../../../lib/telegram";
+import {
+  responseCacheKey,
+  getCachedAnswer,
+  setCachedAnswer,
+  getSemanticCachedAnswer,
+  setSemanticCachedAnswer
+} from "../../../lib/responseCache";
+import { KeywordMatcher } from "../../../lib/keywordMatcher";
+import { TtlLruCache } from "../../../lib/cache";
+import { streamChatWithOpenAI } from "../../../lib/openai";
 import {
   extractClientIp,
   lookupGeo,
@@ -23,20 +39,71 @@ type ChatMessage = {
 };
 
 // ── Dil tespiti (sunucu tarafı — GPT'ye bırakmıyoruz) ─────────────────────
-function detectLanguage(text: string): "en" | "tr" {
+// Yaygın Türkçe kelimeler
+const TR_WORDS = [
+  "ve","bir","bu","da","de","mi","mı","mu","mü","için","ile","ne","nasıl",
+  "neden","kim","nerede","sen","ben","biz","siz","ama","fakat","gibi",
+  "kadar","çok","daha","en","var","yok","iş","para","zaman","hakkında",
+  "yapıyordun","yapıyorsun","neydi","nedir","olur","değil","olan",
+  "veya","ya","ki","ise","hangi","her","hiç",
+];
+
+// Kelime sınırlı tek regex — mesajı split edip Set'te tek tek aramak yerine
+// tek geçişte tarar. \b Türkçe harflerle çalışmadığı için \P{L} lookaround.
+const TR_WORDS_RE = new RegExp(
+  `(?:^|\\P{L})(?:${TR_WORDS.join("|")})(?=\\P{L}|$)`,
+  "u"
+);
+
+// Yüksek değerli anahtar kelimeler (iş teklifi, mülakat vb. → Telegram alarmı + CTA)
+const HIGH_VALUE_KEYWORDS = [
+  "iş teklifi", "job offer", "hiring", "işe almak", "recruit",
+  "işbirliği", "collaboration", "partner", "ortaklık",
+  "danışman", "consultant", "freelance", "proje teklifi",
+  "maaş", "salary", "pozisyon", "position", "fırsat", "opportunity",
+  "cv", "özgeçmiş", "resume",
+  "mülakat", "mülakata", "mülakatı", "interview",
+  "iş görüşmesi", "görüşme", "iş başvurusu", "başvuru",
+  "ulaşabilirim", "iletişim", "contact", "reach out"
+];
+
+// Otomat bir kez kurulur; mesaj tek geçişte taranır (keyword başına includes yerine)
+const HIGH_VALUE_MATCHER = new KeywordMatcher(HIGH_VALUE_KEYWORDS);
+
+const TR_CHARS = /[ğüşıöçĞÜŞİÖÇ]/;
+
+// Dil tespiti memo'su — önerilen sorular gibi tekrar eden mesajlar için
+// kelime taramasını yeniden yapma
+const langCache = new TtlLruCache<"en" | "tr">(500);
+
+function detectLanguage(text: string, lower: string): "en" | "tr" {
+  const cached = langCache.get(lower);
+  if (cached) return cached;
+
+  let lang: "en" | "tr" = "en";
   // Türkçe'ye özgü karakterler varsa kesinlikle Türkçe
-  if (/[ğüşıöçĞÜŞİÖÇ]/.test(text)) return "tr";
-  // Yaygın Türkçe kelimeler
-  const TR_WORDS = new Set([
-    "ve","bir","bu","da","de","mi","mı","mu","mü","için","ile","ne","nasıl",
-    "neden","kim","nerede","sen","ben","biz","siz","ama","fakat","gibi",
-    "kadar","çok","daha","en","var","yok","iş","para","zaman","hakkında",
-    "yapıyordun","yapıyorsun","neydi","nedir","olur","değil","olan","olan",
-    "ama","veya","ya","ki","ise","ile","olan","hangi","her","hiç",
-  ]);
-  const words = text.toLowerCase().split(/\s+/);
-  if (words.some((w) => TR_WORDS.has(w))) return "tr";
-  return "en";
+  if (TR_CHARS.test(text)) {
+    lang = "tr";
+  } else if (TR_WORDS_RE.test(lower)) {
+    lang = "tr";
+  }
+
+  langCache.set(lower, lang);
+  return lang;
+}
+
+// Tek geçişte mesaj analizi: dil + yüksek değerli kelime.
+// Mesajı bir kez lowercase'leyip her iki kontrole de paylaştırıyoruz —
+// ayrı ayrı sınıflandırma turları yerine tek tur.
+function analyzeMessage(message: string): {
+  lang: "en" | "tr";
+  matchedKeyword: string | undefined;
+} {
+  const lower = message.toLowerCase();
+  return {
+    lang: detectLanguage(message, lower),
+    matchedKeyword: HIGH_VALUE_MATCHER.firstMatch(lower),
+  };
 }
 
 // ── Rate limiting (in-memory, dakikada 15 mesaj / IP) ──────────────────────
@@ -56,80 +123,162 @@ function isRateLimited(ip: string): boolean {
   return false;
 }
 
+// Aynı anda gelen birebir aynı yeni-sohbet istekleri tek completion'ı paylaşır
+// (ör. viral bir paylaşımdan sonra herkesin ilk önerilen soruyu sorması)
+const inflightCompletions = new Map<string, Promise<string | null>>();
+
+const FALLBACK_ANSWER = "Şu anda bu soruya cevap veremiyorum.";
+
+// Düz selamlamalar için yerel fast-path — completion'a hiç gitmeden
+// deterministik persona cevabı döner
+// Sondaki noktalama/boşluğu kırpan desen bir kez derlenir (her istekte
+// literal'den yeni RegExp objesi üretmek yerine)
+const TRAILING_PUNCT_RE = /[!?.,\s]+$/;
+
+const PURE_GREETINGS = new Set([
+  "selam", "selamlar", "merhaba", "mrb", "hey", "hi", "hello",
+  "naber", "günaydın", "iyi günler", "iyi akşamlar",
+]);
+
+const GREETING_REPLIES: Record<"tr" | "en", string> = {
+  tr: "Selam! Hoş geldin. Kariyerim, ürün yönetimi ya da AI hakkında aklına gelen her şeyi sorabilirsin.",
+  en: "Hey! Welcome. Ask me anything about my career, product management or AI.",
+};
+
+// Tüm /chat cevapları düz metin stream'i olarak döner; CTA bilgisi header'da
+function textResponse(
+  text: string,
+  showCTA: boolean,
+  setCookie?: string | null
+): Response {
+  const headers: Record<string, string> = {
+    "Content-Type": "text/plain; charset=utf-8",
+    "X-Show-CTA": showCTA ? "1" : "0",
+  };
+  if (setCookie) headers["Set-Cookie"] = setCookie;
+  return new Response(text, { status: 200, headers });
+}
+
+// Yeni sohbet bildirimi — geo lookup + Telegram. Cevap yolunu bloklamamak
+// için çağıran taraf await etmez.
+async function notifyNewChat(rawIp: string, message: string): Promise<void> {
+  const geo = await lookupGeo(rawIp);
+  const location =
+    [geo.city, geo.region, geo.country].filter(Boolean).join(", ") ||
+    "Unknown";
+
+  const preview = message.length > 120 ? message.slice(0, 120) + "…" : message;
+
+  await sendTelegramMessage(
+    `🤖 *OrhanGPT — Yeni Sohbet*\n\n` +
+    `💬 *İlk mesaj:* ${preview}\n\n` +
+    `📍 *Ziyaretçi Lokasyonu:* ${location}\n` +
+    `🌐 *IP:* ${maskIp(rawIp)}\n` +
+    `🕒 *Saat:* ${new Date().toLocaleTimeString("tr-TR")}`
+  );
+}
+
 export async function POST(req: NextRequest) {
   const t0 = Date.now();
 
   try {
     const body = await req.json();
-    const { message, history = [] } = body as {
+    const { message, history = [], uid } = body as {
       message: string;
       history?: ChatMessage[];
+      uid?: string;
     };
 
     const rawIp = extractClientIp(req.headers);
 
+    // Hafıza anahtarı önceliği: client uid > session cookie > IP.
+    // Cookie, uid göndermeyen client'lar (eski sekmeler, 3. parti embed)
+    // için oturum bazlı ayrım sağlar; ikisi de yoksa sid üretilip set edilir.
+    const cookieSid = req.cookies.get("orhan_sid")?.value;
+    const clientUid = typeof uid === "string" && uid ? uid : null;
+    const newSid = !clientUid && !cookieSid ? crypto.randomUUID() : null;
+    const memoryKey = clientUid ?? cookieSid ?? newSid ?? rawIp;
+    const sidCookie = newSid
+      ? `orhan_sid=${newSid}; Path=/; Max-Age=2592000; HttpOnly; SameSite=Lax`
+      : null;
+    const { lang: replyLang, matchedKeyword } = analyzeMessage(message);
+
     if (isRateLimited(rawIp)) {
-      return Response.json(
-        { answer: "Çok hızlı mesaj gönderiyorsun. Bir dakika bekleyip tekrar dener misin?" },
-        { status: 200 }
+      return textResponse(
+        "Çok hızlı mesaj gönderiyorsun. Bir dakika bekleyip tekrar dener misin?",
+        false,
+        sidCookie
       );
     }
 
-    if (!history || history.length <= 1) {
+    const isNewChat = !history || history.length <= 1;
+    if (isNewChat) {
       recordChatStarted();
-
-      const geo = await lookupGeo(rawIp);
-      const location =
-        [geo.city, geo.region, geo.country].filter(Boolean).join(", ") ||
-        "Unknown";
-
-      const preview = message.length > 120 ? message.slice(0, 120) + "…" : message;
-
-      await sendTelegramMessage(
-        `🤖 *OrhanGPT — Yeni Sohbet*\n\n` +
-        `💬 *İlk mesaj:* ${preview}\n\n` +
-        `📍 *Ziyaretçi Lokasyonu:* ${location}\n` +
-        `🌐 *IP:* ${maskIp(rawIp)}\n` +
-        `🕒 *Saat:* ${new Date().toLocaleTimeString("tr-TR")}`
-      );
+      // Bildirim (geo lookup dahil) cevabı bloklamasın — fire & forget
+      notifyNewChat(rawIp, message).catch(() => {});
     }
 
-    // Yüksek değerli anahtar kelime alarmı
-    const HIGH_VALUE_KEYWORDS = [
-      "iş teklifi", "job offer", "hiring", "işe almak", "recruit",
-      "işbirliği", "collaboration", "partner", "ortaklık",
-      "danışman", "consultant", "freelance", "proje teklifi",
-      "maaş", "salary", "pozisyon", "position", "fırsat", "opportunity",
-      "cv", "özgeçmiş", "resume",
-      "mülakat", "mülakata", "mülakatı", "interview",
-      "iş görüşmesi", "görüşme", "iş başvurusu", "başvuru",
-      "ulaşabilirim", "iletişim", "contact", "reach out"
-    ];
-
-    const msgLower = message.toLowerCase();
-    const matchedKeyword = HIGH_VALUE_KEYWORDS.find(kw => msgLower.includes(kw));
-
+    // Yüksek değerli anahtar kelime alarmı — fire & forget
     if (matchedKeyword) {
       const preview = message.length > 200 ? message.slice(0, 200) + "…" : message;
-      await sendTelegramMessage(
+      sendTelegramMessage(
         `🔥 *OrhanGPT — Yüksek Değerli Mesaj*\n\n` +
         `🎯 *Tetikleyen kelime:* \`${matchedKeyword}\`\n\n` +
         `💬 *Mesaj:* ${preview}\n\n` +
         `🌐 *IP:* ${maskIp(rawIp)}\n` +
         `🕒 *Saat:* ${new Date().toLocaleTimeString("tr-TR")}`
-      );
+      ).catch(() => {});
     }
 
-    // Uzun süreli hafıza — paralel yükle
-    const replyLang = detectLanguage(message);
+    const cacheKey = responseCacheKey(message, replyLang);
+
+    // Yerel sınıflandırma fast-path'i: düz selamlama LLM'siz cevaplanır
+    const normalizedMsg = message.toLowerCase().replace(TRAILING_PUNCT_RE, "").trim();
+    if (PURE_GREETINGS.has(normalizedMsg)) {
+      recordMessage(Date.now() - t0, true, rawIp);
+      return textResponse(GREETING_REPLIES[replyLang], false, sidCookie);
+    }
 
-    const [relevantChunks, pastMemory] = await Promise.all([
-      retrieveChunks(message, 5),
-      loadMemory(rawIp),
-    ]);
+    // Sorgu embedding'i bir kez çıkar — hem semantik cache hem retrieval aynı
+    // vektörü kullanır; hafıza yüklemesi embedding'le paralel gider.
+    // Smalltalk ve birebir keyword eşleşmesi olan sorgular embedding'siz
+    // cevaplanabildiği için onlarda hiç çıkarılmaz.
+    const skipEmbedding = isSmalltalk(message) || hasKeywordShortcut(message);
+    const vectorPromise = skipEmbedding
+      ? Promise.resolve<number[] | null>(null)
+      : embedQuery(message);
+    const pastMemory = await loadMemory(memoryKey);
+
+    // Cevap cache'i — aynı ilk mesaj kısa süre önce sorulduysa OpenAI'yi
+    // tamamen atla. Semantik katmanla aynı koşul: geçmişsiz VE hafızasız.
+    // Hafızası olan dönen ziyaretçi cache yerine kişiselleştirilmiş akışa
+    // düşer; embedding zaten paralel başladığı için hit yolunda beklenmez.
+    if (isNewChat && !pastMemory) {
+      const cached = getCachedAnswer(cacheKey);
+      if (cached) {
+        recordMessage(Date.now() - t0, true, rawIp);
+        return textResponse(cached, !!matchedKeyword, sidCookie);
+      }
+    }
+
+    const queryVector = await vectorPromise;
+
+    // Semantik cache — exact match kaçırdıysa anlamca aynı soruyu yakala
+    if (isNewChat && !pastMemory && queryVector) {
+      const semCached = getSemanticCachedAnswer(queryVector, replyLang);
+      if (semCached) {
+        recordMessage(Date.now() - t0, true, rawIp);
+        return textResponse(semCached, !!matchedKeyword, sidCookie);
+      }
+    }
+
+    const relevantChunks = await retrieveChunks(message, 5, queryVector);
     const contextBlock = formatChunksForPrompt(relevantChunks);
     const memoryBlock = pastMemory ? formatMemoryForPrompt(pastMemory) : null;
 
+    // Prompt düzeni: statik kısım (persona + kurallar) değişmeden başta durur,
+    // değişken kısımlar (dil, bağlam, hafıza) sona eklenir — böylece OpenAI'nin
+    // otomatik prompt caching'i sabit prefix'i cache'leyebilir.
     const systemPrompt = `
 You are OrhanGPT — the digital twin of Uğur Orhan Karaköprü.
 
@@ -137,11 +286,6 @@ You ARE Orhan. Not an assistant describing him. You speak as him, in first perso
 
 ---
 
-## LANGUAGE — MANDATORY
-REPLY LANGUAGE: ${replyLang === "en" ? "ENGLISH ONLY. Do not use any Turkish words." : "TURKISH. Teknik jargon (data-driven, north star, assumption) Türkçe cümleler içinde kullanılabilir."}
-
----
-
 ## PERSONALITY & TONE
 - Samimi ve direkt. Lafı dolandırma, konuya gir.
 - Biraz gamsız ama kafana koyduğun şeyler için sonuna kadar gidersin.
@@ -161,55 +305,98 @@ REPLY LANGUAGE: ${replyLang === "en" ? "ENGLISH ONLY. Do not use any Turkish wor
 
 ---
 
+## LANGUAGE — MANDATORY
+REPLY LANGUAGE: ${replyLang === "en" ? "ENGLISH ONLY. Do not use any Turkish words." : "TURKISH. Teknik jargon (data-driven, north star, assumption) Türkçe cümleler içinde kullanılabilir."}
+
+---
+
 ## İLGİLİ BİLGİ TABANI (soruya göre seçildi)
 ${contextBlock || "Genel sohbet — yukarıdaki kişilik kurallarına göre cevap ver."}
 ${memoryBlock ? `\n## GEÇMİŞ SOHBET BAĞLAMI\n${memoryBlock}` : ""}
 `;
 
+    // Prompt'a tüm geçmişi değil son turları gönder — localStorage'daki
+    // geçmiş sınırsız büyüyor ve her istekte token olarak faturalanıyor;
+    // eski turların özü zaten uzun süreli hafızada.
+    const HISTORY_WINDOW = 12;
+    const recentHistory = history.slice(-HISTORY_WINDOW);
+
     const messages = [
       { role: "system", content: systemPrompt },
-      ...history,
+      ...recentHistory,
       { role: "user", content: message }
     ];
 
-    const res = await fetch("https://api.openai.com/v1/chat/completions", {
-      method: "POST",
-      headers: {
-        Authorization: `Bearer ${process.env.OPENAI_API_KEY}`,
-        "Content-Type": "application/json"
-      },
-      body: JSON.stringify({
-        model: "gpt-4o-mini",
-        temperature: 0.7,
-        messages
-      })
-    });
-
-    // OpenAI bazen HTML hata sayfası döner (Cloudflare 502 vb.) — JSON parse'ı güvenli yap
-    let answer = "Şu anda bu soruya cevap veremiyorum.";
-    if (res.ok) {
-      try {
-        const data = await res.json();
-        answer = data?.choices?.[0]?.message?.content ?? answer;
-      } catch {
-        console.error("OpenAI JSON parse error, status:", res.status);
+    // Hafızayı güncelle (fire & forget — yanıtı bloklamaz).
+    // Her istekte değil, pencere bazlı: ilk mesajda ve sonrasında her 3
+    // kullanıcı mesajında bir Redis'e yazılır — ara turlarda özet zaten
+    // değişmiyor, istek başına bir yazma turu gereksiz.
+    const userTurns = history.filter((m) => m.role === "user").length + 1;
+    if (userTurns === 1 || userTurns % 3 === 0) {
+      saveMemory(memoryKey, [...history, { role: "user", content: message }], pastMemory).catch(() => {});
+    }
+
+    // Kişiselleştirilmemiş istekler (yeni sohbet + hafıza yok) hem cache'e
+    // yazılabilir hem de eşzamanlı birebir kopyalarıyla tek çağrıyı paylaşabilir
+    const shareable = isNewChat && !pastMemory;
+
+    // Eşzamanlı birebir kopya: devam eden completion'ın sonucunu bekle
+    if (shareable) {
+      const existing = inflightCompletions.get(cacheKey);
+      if (existing) {
+        const sharedContent = await existing;
+        recordMessage(Date.now() - t0, !!sharedContent, rawIp);
+        return textResponse(sharedContent ?? FALLBACK_ANSWER, !!matchedKeyword, sidCookie);
       }
-    } else {
-      console.error("OpenAI non-OK response:", res.status, res.statusText);
     }
 
-    recordMessage(Date.now() - t0, true, rawIp);
+    let resolveInflight: ((value: string | null) => void) | undefined;
+    if (shareable) {
+      const pending = new Promise<string | null>((resolve) => {
+        resolveInflight = resolve;
+      });
+      inflightCompletions.set(cacheKey, pending);
+    }
+
+    // Stream bittiğinde: cache'e yaz, bekleyen kopyaları çöz, metrik kaydet
+    const finish = (fullText: string) => {
+      const ok = fullText.length > 0;
+      if (ok && shareable) {
+        setCachedAnswer(cacheKey, fullText);
+        if (queryVector) setSemanticCachedAnswer(queryVector, fullText, replyLang);
+      }
+      resolveInflight?.(ok ? fullText : null);
+      if (shareable) inflightCompletions.delete(cacheKey);
+      recordMessage(Date.now() - t0, ok, rawIp);
+    };
 
-    // Hafızayı güncelle (fire & forget — yanıtı bloklamaz)
-    saveMemory(rawIp, [...history, { role: "user", content: message }], pastMemory).catch(() => {});
+    // Cevabı buffer'lamadan client'a stream et — ilk token anında görünür.
+    // fetch reddi (ağ hatası) burada yakalanır ki inflight girdisi asılı
+    // kalıp aynı cache key'ini süresiz kilitlemesin.
+    let stream: ReadableStream<Uint8Array> | null = null;
+    try {
+      stream = await streamChatWithOpenAI(messages, {}, finish);
+    } catch (err) {
+      console.error("OpenAI stream connect error:", err);
+    }
+    if (!stream) {
+      finish("");
+      return textResponse(FALLBACK_ANSWER, !!matchedKeyword, sidCookie);
+    }
+
+    const streamHeaders: Record<string, string> = {
+      "Content-Type": "text/plain; charset=utf-8",
+      "X-Show-CTA": matchedKeyword ? "1" : "0",
+    };
+    if (sidCookie) streamHeaders["Set-Cookie"] = sidCookie;
 
-    return Response.json({ answer, showCTA: !!matchedKeyword });
+    return new Response(stream, { status: 200, headers: streamHeaders });
   } catch (error) {
     console.error("CHAT API ERROR:", error instanceof Error ? error.message : error);
     recordMessage(Date.now() - t0, false, extractClientIp(req.headers));
-    return Response.json(
-      { answer: "Şu an bir sorun var, birkaç saniye sonra tekrar dener misin?" },
-      { status: 200 }
+    return textResponse(
+      "Şu an bir sorun var, birkaç saniye sonra tekrar dener misin?",
+      false
     );
   }
 }
@@ -1,6 +1,8 @@
 import { NextRequest } from "next/server";
-import { getDocuments } from "../../../../lib/labDocuments";
+import { getDocuments, getDocumentsVersion } from "../../../../lib/labDocuments";
 import { chatWithGroq } from "../../../../lib/groq";
+import { chatWithOpenAI } from "../../../../lib/openai";
+import { TtlLruCache } from "../../../../lib/cache";
 
 export const runtime = "nodejs";
 
@@ -9,30 +11,21 @@ type LabMessage = {
   content: string;
 };
 
+// auto routing heuristiği — backend başına module scope'ta derlenmiş tek
+// alternation regex (keyword başına ayrı includes taraması yerine)
+const GROQ_HINTS = /code|refactor|debug|hata|stack trace/;
+const OPENAI_HINTS = /sunum|ppt|slide|deck/;
+
 function pickModel(
   userMessage: string,
   selected: "auto" | "openai" | "groq"
 ): "openai" | "groq" {
-  const text = userMessage.toLowerCase();
-
   if (selected === "openai") return "openai";
   if (selected === "groq") return "groq";
 
-  // auto routing (çok basit heuristic)
-  if (
-    text.includes("code") ||
-    text.includes("refactor") ||
-    text.includes("debug") ||
-    text.includes("hata") ||
-    text.includes("stack trace")
-  ) return "groq";
-
-  if (
-    text.includes("sunum") ||
-    text.includes("ppt") ||
-    text.includes("slide") ||
-    text.includes("deck")
-  ) return "openai";
+  const text = userMessage.toLowerCase();
+  if (GROQ_HINTS.test(text)) return "groq";
+  if (OPENAI_HINTS.test(text)) return "openai";
 
   return "openai";
 }
@@ -47,11 +40,16 @@ const STOP = new Set([
   "it","this","that","with","as","by","from","at","be"
 ]);
 
+// Tokenizer hot path'te chunk başına çalışır — desenler bir kez derlenir
+const NON_WORD_RE = /[^a-z0-9çğıöşü\s]/gi;
+const WHITESPACE_RE = /\s+/;
+const PARA_SPLIT_RE = /\n{2,}/g;
+
 function tokenize(s: string): string[] {
   return s
     .toLowerCase()
-    .replace(/[^a-z0-9çğıöşü\s]/gi, " ")
-    .split(/\s+/)
+    .replace(NON_WORD_RE, " ")
+    .split(WHITESPACE_RE)
     .map(t => t.trim())
     .filter(t => t.length >= 2 && !STOP.has(t));
 }
@@ -65,7 +63,7 @@ type Chunk = {
 function chunkText(docName: string, text: string): Chunk[] {
   // Paragraflara böl, sonra max uzunlukla birleştir
   const paras = text
-    .split(/\n{2,}/g)
+    .split(PARA_SPLIT_RE)
     .map(p => p.trim())
     .filter(Boolean);
 
@@ -139,7 +137,39 @@ function scoreChunk(queryTokens: string[], chunkText: string, rawQuery: string):
   return score / norm;
 }
 
-function buildContext(rawQuery: string) {
+// Doküman başına chunk cache'i — içerik upload sonrası değişmediği için
+// her istekte yeniden chunk'lamaya gerek yok. Kaba sınır: cache şişerse
+// (silinmiş dokümanların artıkları) komple sıfırla.
+const chunkCache = new Map<string, Chunk[]>();
+
+function chunksForDoc(doc: { id: string; name: string; content: string }): Chunk[] {
+  const cached = chunkCache.get(doc.id);
+  if (cached) return cached;
+
+  const chunks = chunkText(doc.name, doc.content);
+  if (chunkCache.size > 100) chunkCache.clear();
+  chunkCache.set(doc.id, chunks);
+  return chunks;
+}
+
+type ContextResult = { context: string; usedDocs: string[] };
+
+// Aynı (normalize sorgu, doküman seti) için retrieval sonucu memoize edilir —
+// doküman versiyonu key'de olduğu için upload/clear sonrası eski girişler
+// kendiliğinden ıskalar
+const contextCache = new TtlLruCache<ContextResult>(100, 10 * 60 * 1000);
+
+function buildContext(rawQuery: string): ContextResult {
+  const cacheKey = `${getDocumentsVersion()}:${rawQuery.toLowerCase().trim()}`;
+  const cached = contextCache.get(cacheKey);
+  if (cached) return cached;
+
+  const result = buildContextUncached(rawQuery);
+  contextCache.set(cacheKey, result);
+  return result;
+}
+
+function buildContextUncached(rawQuery: string): ContextResult {
   const docs = getDocuments();
 
   // doküman yoksa context yok
@@ -159,7 +189,7 @@ function buildContext(rawQuery: string) {
   const queryTokens = tokenize(rawQuery);
   const allChunks: Chunk[] = [];
   for (const d of usable) {
-    allChunks.push(...chunkText(d.name, d.content));
+    allChunks.push(...chunksForDoc(d));
   }
 
   // skorla
@@ -195,6 +225,15 @@ function buildContext(rawQuery: string) {
 
 /* -------------------- handler -------------------- */
 
+// Statik talimat metinleri — her istekte aynı kalır (prompt caching prefix'i)
+const RAG_INSTRUCTION =
+  `You have access to the user's uploaded documents below. ` +
+  `Answer the user's question using ONLY the provided document context when relevant. ` +
+  `If the documents do not contain the answer, say you cannot find it in the uploaded documents.`;
+
+const NO_DOC_INSTRUCTION =
+  `No uploaded document context is available. Answer normally.`;
+
 export async function POST(req: NextRequest) {
   try {
     const body = await req.json();
@@ -217,28 +256,24 @@ export async function POST(req: NextRequest) {
     // RAG context
     const { context, usedDocs } = buildContext(message);
 
-    // System messages: user supplied + RAG instruction
+    // System messages: statik talimat önce, değişken kısımlar (kullanıcının
+    // system prompt'u, doküman bağlamı) sona — böylece istekler arası sabit
+    // kalan prefix OpenAI'nin otomatik prompt caching'inden faydalanır
     const systemMessages: LabMessage[] = [];
 
+    systemMessages.push({
+      role: "system",
+      content: context ? RAG_INSTRUCTION : NO_DOC_INSTRUCTION
+    });
+
     if (systemPrompt && systemPrompt.trim()) {
       systemMessages.push({ role: "system", content: systemPrompt });
     }
 
-    // RAG instruction: doküman varsa ekle
     if (context) {
       systemMessages.push({
         role: "system",
-        content:
-          `You have access to the user's uploaded documents below. ` +
-          `Answer the user's question using ONLY the provided document context when relevant. ` +
-          `If the documents do not contain the answer, say you cannot find it in the uploaded documents.\n\n` +
-          `DOCUMENT CONTEXT:\n${context}`
-      });
-    } else {
-      systemMessages.push({
-        role: "system",
-        content:
-          `No uploaded document context is available. Answer normally.`
+        content: `DOCUMENT CONTEXT:\n${context}`
       });
     }
 
@@ -256,10 +291,10 @@ export async function POST(req: NextRequest) {
         answer = await chatWithGroq(messages, temperature);
       } catch (err) {
         console.error("GROQ FAILED, FALLBACK TO OPENAI", err);
-        answer = await chatWithOpenAI(messages, temperature);
+        answer = await openaiAnswer(messages, temperature);
       }
     } else {
-      answer = await chatWithOpenAI(messages, temperature);
+      answer = await openaiAnswer(messages, temperature);
     }
 
     return Response.json({
@@ -273,25 +308,10 @@ export async function POST(req: NextRequest) {
   }
 }
 
-async function chatWithOpenAI(messages: LabMessage[], temperature: number) {
-  const res = await fetch("https://api.openai.com/v1/chat/completions", {
-    method: "POST",
-    headers: {
-      Authorization: `Bearer ${process.env.OPENAI_API_KEY}`,
-      "Content-Type": "application/json"
-    },
-    body: JSON.stringify({
-      model: "gpt-4o-mini",
-      temperature,
-      max_tokens: 700,
-      messages
-    })
-  });
-
-  const data = await res.json();
-
-  const content = data?.choices?.[0]?.message?.content;
-  if (!content || !String(content).trim()) {
+async function openaiAnswer(messages: LabMessage[], temperature: number) {
+  const content = await chatWithOpenAI(messages, { temperature, maxTokens: 700 });
+
+  if (!content || !content.trim()) {
     // OpenAI bazen boş dönebilir; net fallback
     return "Bu soruya şu an yanıt üretemedim. Doküman içeriğini daha spesifik soruyla tekrar dener misin?";
   }
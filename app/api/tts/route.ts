@@ -1,19 +1,58 @@
 import { NextRequest } from "next/server";
 
+import { TtlLruCache } from "../../../lib/cache";
+
 export const runtime = "nodejs";
 
 const OPENAI_API_KEY = process.env.OPENAI_API_KEY;
 
+// Sentezlenen ses cache'i — aynı cevap tekrar dinlendiğinde (veya başka bir
+// ziyaretçi aynı cache'lenmiş cevabı dinlediğinde) OpenAI TTS'e gitme
+const ttsCache = new TtlLruCache<ArrayBuffer>(50, 60 * 60 * 1000);
+
+// Metin için zayıf ETag üret (djb2)
+function textEtag(text: string): string {
+  let hash = 5381;
+  for (let i = 0; i < text.length; i++) {
+    hash = ((hash << 5) + hash + text.charCodeAt(i)) | 0;
+  }
+  return `"tts-${(hash >>> 0).toString(16)}"`;
+}
+
+function audioResponse(buffer: ArrayBuffer, etag: string): Response {
+  return new Response(buffer, {
+    headers: {
+      "Content-Type": "audio/mpeg",
+      "Content-Length": String(buffer.byteLength),
+      "Cache-Control": "private, max-age=3600",
+      ETag: etag,
+    },
+  });
+}
+
 // Markdown işaretlerini temizle (TTS için düz metin)
+// Module scope'ta derlenmiş tek alternation regex'ler — bold/italic/inline code
+// ayrı ayrı .replace geçişleri yerine metin üzerinden tek geçişte temizlenir
+const INLINE_MARKS = /\*\*(.*?)\*\*|\*(.*?)\*|`(.*?)`/g; // bold | italic | inline code
+const BLOCK_MARKS = /#{1,6}\s|>\s/g;                     // headings | blockquotes
+const PARA_BREAK = /\n{2,}/g;                            // double newlines → pause
+const LINE_BREAK = /\n/g;
+
 function stripMarkdown(text: string): string {
-  return text
-    .replace(/\*\*(.*?)\*\*/g, "$1")   // bold
-    .replace(/\*(.*?)\*/g, "$1")        // italic
-    .replace(/`(.*?)`/g, "$1")          // inline code
-    .replace(/#{1,6}\s/g, "")           // headings
-    .replace(/>\s/g, "")                // blockquotes
-    .replace(/\n{2,}/g, ". ")           // double newlines → pause
-    .replace(/\n/g, " ")                // single newlines
+  // İç içe işaretler (**kalın *italik* metin**) tek geçişte çıkmaz —
+  // replace kendi çıktısını yeniden taramadığı için metin sabitlenene
+  // kadar tekrarla (pratikte 1-2 tur)
+  let out = text;
+  let prev;
+  do {
+    prev = out;
+    out = out.replace(INLINE_MARKS, (_, bold, italic, code) => bold ?? italic ?? code ?? "");
+  } while (out !== prev);
+
+  return out
+    .replace(BLOCK_MARKS, "")
+    .replace(PARA_BREAK, ". ")
+    .replace(LINE_BREAK, " ")
     .trim();
 }
 
@@ -35,6 +74,15 @@ export async function POST(req: NextRequest) {
     }
 
     const cleanText = stripMarkdown(text).slice(0, 4096); // OpenAI TTS limit
+    const etag = textEtag(cleanText);
+
+    // Conditional request: client elindeki kopya hâlâ geçerli
+    if (req.headers.get("if-none-match") === etag) {
+      return new Response(null, { status: 304, headers: { ETag: etag } });
+    }
+
+    const cached = ttsCache.get(cleanText);
+    if (cached) return audioResponse(cached, etag);
 
     const res = await fetch("https://api.openai.com/v1/audio/speech", {
       method: "POST",
@@ -60,14 +108,39 @@ export async function POST(req: NextRequest) {
       });
     }
 
+    // Cache miss: sesi tam indirip bekletmek yerine client'a geldiği gibi
+    // akıt; aynı anda cache için biriktir (flush'ta tek buffer'a birleşir)
+    if (res.body) {
+      const parts: Uint8Array[] = [];
+      const tee = new TransformStream<Uint8Array, Uint8Array>({
+        transform(chunk, controller) {
+          parts.push(chunk);
+          controller.enqueue(chunk);
+        },
+        flush() {
+          let total = 0;
+          for (const p of parts) total += p.byteLength;
+          const buf = new Uint8Array(total);
+          let offset = 0;
+          for (const p of parts) {
+            buf.set(p, offset);
+            offset += p.byteLength;
+          }
+          ttsCache.set(cleanText, buf.buffer);
+        },
+      });
+      return new Response(res.body.pipeThrough(tee), {
+        headers: {
+          "Content-Type": "audio/mpeg",
+          "Cache-Control": "private, max-age=3600",
+          ETag: etag,
+        },
+      });
+    }
+
     const audioBuffer = await res.arrayBuffer();
-    return new Response(audioBuffer, {
-      headers: {
-        "Content-Type": "audio/mpeg",
-        "Content-Length": String(audioBuffer.byteLength),
-        "Cache-Control": "no-store",
-      },
-    });
+    ttsCache.set(cleanText, audioBuffer);
+    return audioResponse(audioBuffer, etag);
   } catch (error) {
     console.error("TTS route error:", error);
     return new Response(JSON.stringify({ error: "Internal error" }), {
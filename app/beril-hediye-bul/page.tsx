@@ -957,6 +957,17 @@ const ALL_PRODUCTS: Product[] = [
 
 const SESSION_SIZE = 20;
 
+// Occasion → ürün index'i bir kez kurulur; her "Başla" tıklamasında 100+
+// ürünün occasions dizisini lineer taramak yerine hazır listeden kopyalanır
+const PRODUCTS_BY_OCCASION = new Map<Occasion, Product[]>();
+for (const product of ALL_PRODUCTS) {
+  for (const occ of product.occasions) {
+    const list = PRODUCTS_BY_OCCASION.get(occ);
+    if (list) list.push(product);
+    else PRODUCTS_BY_OCCASION.set(occ, [product]);
+  }
+}
+
 type SwipeDirection = "left" | "right" | null;
 
 function ProductCard({
@@ -1104,7 +1115,7 @@ export default function BerilHediyeBul() {
   const dragStartX = useRef(0);
 
   function startOccasion(occasion: Occasion) {
-    const filtered = ALL_PRODUCTS.filter((p) => p.occasions.includes(occasion));
+    const filtered = [...(PRODUCTS_BY_OCCASION.get(occasion) ?? [])];
     for (let i = filtered.length - 1; i > 0; i--) {
       const j = Math.floor(Math.random() * (i + 1));
       [filtered[i], filtered[j]] = [filtered[j], filtered[i]];
@@ -10,6 +10,18 @@ type Message = {
 };
 
 const STORAGE_KEY = "orhan-gpt-history";
+const UID_KEY = "orhan-gpt-uid";
+
+// Kalıcı ziyaretçi kimliği — sunucu tarafı hafıza IP yerine buna bağlanır
+// (aynı NAT arkasındaki ziyaretçiler birbirinin hafızasını görmesin)
+function getClientUid(): string {
+  let uid = localStorage.getItem(UID_KEY);
+  if (!uid) {
+    uid = crypto.randomUUID();
+    localStorage.setItem(UID_KEY, uid);
+  }
+  return uid;
+}
 
 const SUGGESTED_QUESTIONS = [
   "PM olmadan önce ne yapıyordun?",
@@ -168,43 +180,37 @@ export default function Home() {
       const res = await fetch("/api/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: userMessage.content, history: messages }),
+        body: JSON.stringify({ message: userMessage.content, history: messages, uid: getClientUid() }),
       });
 
-      const data = await res.json();
-      const fullText: string = data.answer ?? "";
-      const showCTA: boolean = !!data.showCTA;
+      const showCTA = res.headers.get("X-Show-CTA") === "1";
 
-      if (!fullText) {
+      if (!res.ok || !res.body) {
         setMessages((prev) => [...prev, { role: "assistant", content: "Şu an cevap veremedim, tekrar dener misin?" }]);
         setLoading(false);
         return;
       }
 
-      let index = 0;
-      const speed = fullText.length < 200 ? 22 : fullText.length < 600 ? 13 : 7;
-
-      const interval = setInterval(() => {
-        index++;
-        setTypingText(fullText.slice(0, index));
-        if (index >= fullText.length) {
-          clearInterval(interval);
-          setMessages((prev) => [...prev, { role: "assistant", content: fullText, showCTA }]);
-          setTypingText("");
-          setLoading(false);
-        }
-      }, speed);
-
-      setTimeout(() => {
-        clearInterval(interval);
-        setMessages((prev) => {
-          const last = prev[prev.length - 1];
-          if (last?.role === "assistant") return prev;
-          return [...prev, { role: "assistant", content: fullText, showCTA }];
-        });
-        setTypingText("");
-        setLoading(false);
-      }, 15000);
+      // Gerçek streaming — token'lar sunucudan geldikçe göster
+      // (eski sahte typing animasyonunun yerini aldı)
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let fullText = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        fullText += decoder.decode(value, { stream: true });
+        setTypingText(fullText);
+      }
+
+      if (!fullText) {
+        setMessages((prev) => [...prev, { role: "assistant", content: "Şu an cevap veremedim, tekrar dener misin?" }]);
+      } else {
+        setMessages((prev) => [...prev, { role: "assistant", content: fullText, showCTA }]);
+      }
+      setTypingText("");
+      setLoading(false);
     } catch {
       setMessages((prev) => [...prev, { role: "assistant", content: "Bir hata oluştu, tekrar dener misin?" }]);
       setTypingText("");
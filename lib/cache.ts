@@ -0,0 +1,39 @@
+/**
+ * Basit bounded TTL + LRU cache — in-memory cache ihtiyaçlarının
+ * (cevap cache'i, geo lookup, dil tespiti) ortak altyapısı.
+ *
+ * Map insertion-order özelliğine dayanır: erişilen giriş sona taşınır,
+ * kapasite dolunca en öndeki (en eski) atılır.
+ */
+export class TtlLruCache<V> {
+  private map = new Map<string, { value: V; expiresAt: number }>();
+
+  constructor(
+    private maxEntries: number,
+    private ttlMs: number = Infinity
+  ) {}
+
+  get(key: string): V | undefined {
+    const entry = this.map.get(key);
+    if (!entry) return undefined;
+    if (entry.expiresAt < Date.now()) {
+      this.map.delete(key);
+      return undefined;
+    }
+    // LRU: erişileni en sona taşı
+    this.map.delete(key);
+    this.map.set(key, entry);
+    return entry.value;
+  }
+
+  set(key: string, value: V): void {
+    if (this.map.size >= this.maxEntries) {
+      const oldest = this.map.keys().next().value;
+      if (oldest !== undefined) this.map.delete(oldest);
+    }
+    this.map.set(key, {
+      value,
+      expiresAt: this.ttlMs === Infinity ? Infinity : Date.now() + this.ttlMs,
+    });
+  }
+}
@@ -1,3 +1,5 @@
+import { TtlLruCache } from "./cache";
+
 export type GeoResult = {
   city?: string;
   region?: string;
@@ -26,20 +28,32 @@ export function maskIp(ip: string) {
   return ip.slice(0, 6) + "…";
 }
 
+// Geo-IP cache — aynı IP'nin lokasyonu kısa sürede değişmez, her sohbet
+// başlangıcında ipapi.co'ya gitme
+const GEO_TTL_MS = 60 * 60 * 1000; // 1 saat
+const geoCache = new TtlLruCache<GeoResult>(1000, GEO_TTL_MS);
+
 export async function lookupGeo(ip: string): Promise<GeoResult> {
   if (!ip || ip === "unknown") return { ip: "unknown" };
 
+  const cached = geoCache.get(ip);
+  if (cached) return cached;
+
   try {
     const res = await fetch(`https://ipapi.co/${ip}/json/`);
     if (!res.ok) return { ip };
 
     const data: any = await res.json();
-    return {
+    const result: GeoResult = {
       ip,
       city: data?.city,
       region: data?.region,
       country: data?.country_name
     };
+
+    geoCache.set(ip, result);
+
+    return result;
   } catch {
     return { ip };
   }
@@ -23,12 +23,19 @@ export async function chatWithGroq(
       body: JSON.stringify({
         model: "llama-3.1-8b-instant",
         temperature,
+        max_tokens: 700, // OpenAI tarafıyla aynı cap — kaçak uzun cevap üretme
         messages
       })
     }
   );
 
-  const data = await res.json();
+  // Gateway hata sayfaları JSON olmayabilir — parse'ı güvenli yap
+  let data;
+  try {
+    data = await res.json();
+  } catch {
+    throw new Error(`Groq non-JSON response: ${res.status}`);
+  }
 
   if (data?.error) {
     throw new Error(`Groq error: ${data.error.message}`);
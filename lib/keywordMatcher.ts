@@ -0,0 +1,95 @@
+/**
+ * Aho-Corasick tabanlı çoklu anahtar kelime eşleyici.
+ *
+ * Keyword başına ayrı String.includes taraması (O(keyword sayısı × metin))
+ * yerine otomat bir kez kurulur ve metin tek geçişte taranır.
+ * Eşleşme semantiği includes ile aynı: substring, kelime sınırı aranmaz.
+ */
+
+type AcNode = {
+  next: Map<string, number>; // karakter → state
+  fail: number;              // failure link
+  word: string | null;       // bu state'te biten keyword (varsa)
+};
+
+export class KeywordMatcher {
+  private nodes: AcNode[] = [{ next: new Map(), fail: 0, word: null }];
+
+  constructor(keywords: string[]) {
+    for (const kw of keywords) this.add(kw);
+    this.buildFailLinks();
+  }
+
+  private add(word: string): void {
+    let state = 0;
+    for (const ch of word) {
+      let nextState = this.nodes[state].next.get(ch);
+      if (nextState === undefined) {
+        nextState = this.nodes.length;
+        this.nodes.push({ next: new Map(), fail: 0, word: null });
+        this.nodes[state].next.set(ch, nextState);
+      }
+      state = nextState;
+    }
+    this.nodes[state].word = word;
+  }
+
+  private buildFailLinks(): void {
+    const queue: number[] = [];
+    for (const s of this.nodes[0].next.values()) {
+      queue.push(s);
+    }
+    while (queue.length > 0) {
+      const r = queue.shift()!;
+      for (const [ch, s] of this.nodes[r].next) {
+        queue.push(s);
+        let f = this.nodes[r].fail;
+        while (f !== 0 && !this.nodes[f].next.has(ch)) f = this.nodes[f].fail;
+        const target = this.nodes[f].next.get(ch);
+        this.nodes[s].fail = target !== undefined && target !== s ? target : 0;
+        // Dictionary link: daha kısa bir keyword bu state'te bitiyorsa miras al
+        if (!this.nodes[s].word) {
+          this.nodes[s].word = this.nodes[this.nodes[s].fail].word;
+        }
+      }
+    }
+  }
+
+  /**
+   * Metindeki ilk eşleşen keyword'ü döndürür (metin lowercase beklenir).
+   * includes tabanlı taramadan farkı: liste sırası değil, metinde en önce
+   * biten eşleşme döner — "herhangi bir keyword geçti mi" kullanımında eşdeğer.
+   */
+  firstMatch(text: string): string | undefined {
+    let state = 0;
+    for (const ch of text) {
+      while (state !== 0 && !this.nodes[state].next.has(ch)) {
+        state = this.nodes[state].fail;
+      }
+      state = this.nodes[state].next.get(ch) ?? 0;
+      const w = this.nodes[state].word;
+      if (w) return w;
+    }
+    return undefined;
+  }
+
+  /**
+   * Metinde geçen tüm keyword'lerin kümesini tek geçişte döndürür.
+   * Failure zinciri yürünerek iç içe eşleşmeler de yakalanır.
+   */
+  allMatches(text: string): Set<string> {
+    const found = new Set<string>();
+    let state = 0;
+    for (const ch of text) {
+      while (state !== 0 && !this.nodes[state].next.has(ch)) {
+        state = this.nodes[state].fail;
+      }
+      state = this.nodes[state].next.get(ch) ?? 0;
+      for (let s = state; s !== 0; s = this.nodes[s].fail) {
+        const w = this.nodes[s].word;
+        if (w) found.add(w);
+      }
+    }
+    return found;
+  }
+}
@@ -11,14 +11,26 @@ if (!g.__LAB_DOCUMENTS__) {
   g.__LAB_DOCUMENTS__ = [] as LabDocument[];
 }
 
+// Doküman seti her değiştiğinde artar — retrieval cache'lerinin
+// "dokümanlar hâlâ aynı mı" kontrolü için ucuz bir damga
+if (!g.__LAB_DOCUMENTS_VERSION__) {
+  g.__LAB_DOCUMENTS_VERSION__ = 0;
+}
+
 export function addDocument(doc: LabDocument) {
   g.__LAB_DOCUMENTS__.push(doc);
+  g.__LAB_DOCUMENTS_VERSION__++;
 }
 
 export function getDocuments(): LabDocument[] {
   return g.__LAB_DOCUMENTS__;
 }
 
+export function getDocumentsVersion(): number {
+  return g.__LAB_DOCUMENTS_VERSION__;
+}
+
 export function clearDocuments() {
   g.__LAB_DOCUMENTS__ = [];
+  g.__LAB_DOCUMENTS_VERSION__++;
 }
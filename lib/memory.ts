@@ -2,7 +2,7 @@
  * Uzun süreli hafıza — Upstash Redis REST API
  * Paket gerektirmez, sadece fetch kullanır.
  *
- * Key: memory:{hashedIp}
+ * Key: memory:{hashedKey} — client uid (varsa) veya IP
  * Value: { summary, topics, lastSeen, messageCount }
  * TTL: 30 gün
  */
@@ -51,20 +51,20 @@ async function redisSet(key: string, value: string, ttl: number): Promise<void>
   }
 }
 
-// IP'yi hash'le (privacy)
-async function hashIp(ip: string): Promise<string> {
+// Ziyaretçi anahtarını (uid veya IP) hash'le (privacy)
+async function hashKey(key: string): Promise<string> {
   const encoder = new TextEncoder();
-  const data = encoder.encode(ip + "orhan-salt");
+  const data = encoder.encode(key + "orhan-salt");
   const hashBuffer = await crypto.subtle.digest("SHA-256", data);
   const hashArray = Array.from(new Uint8Array(hashBuffer));
   return hashArray.map((b) => b.toString(16).padStart(2, "0")).join("").slice(0, 16);
 }
 
-// Geçmiş hafızayı yükle
-export async function loadMemory(ip: string): Promise<Memory | null> {
+// Geçmiş hafızayı yükle — key: client uid (varsa) veya IP
+export async function loadMemory(key: string): Promise<Memory | null> {
   if (!REDIS_URL || !REDIS_TOKEN) return null;
   try {
-    const hash = await hashIp(ip);
+    const hash = await hashKey(key);
     const raw = await redisGet(`memory:${hash}`);
     if (!raw) return null;
     const parsed = JSON.parse(raw);
@@ -82,7 +82,7 @@ export async function loadMemory(ip: string): Promise<Memory | null> {
 
 // Sohbetten topic'leri çıkar ve hafızayı güncelle
 export async function saveMemory(
-  ip: string,
+  key: string,
   messages: { role: string; content: string }[],
   existingMemory: Memory | null
 ): Promise<void> {
@@ -90,7 +90,7 @@ export async function saveMemory(
   if (messages.length < 2) return;
 
   try {
-    const hash = await hashIp(ip);
+    const hash = await hashKey(key);
 
     // Kullanıcı mesajlarından konuları çıkar
     const userMessages = messages
@@ -0,0 +1,148 @@
+/**
+ * Ortak OpenAI chat completion yardımcısı — chat ve lab route'ları aynı
+ * endpoint/hata-yönetimi kodunu tekrarlamasın.
+ *
+ * İçerik çıkmazsa null döner; OpenAI bazen HTML hata sayfası döndürdüğü
+ * için (Cloudflare 502 vb.) JSON parse güvenli yapılır.
+ */
+
+export type OpenAIMessage = {
+  role: string;
+  content: string;
+};
+
+type CompletionOptions = {
+  temperature?: number;
+  maxTokens?: number;
+};
+
+/**
+ * Streaming chat completion — SSE delta'larını düz metin byte'larına çevirip
+ * ReadableStream olarak döner. Akış başarıyla tamamlanınca
+ * onComplete(fullText) çağrılır (cache'e yazmak / metrik kaydetmek için);
+ * okuma hatası veya client iptali durumunda onComplete("") ile çağrılır ki
+ * yarım kalan metin tam cevap sanılıp cache'lenmesin. Bağlantı kurulamazsa
+ * null döner.
+ */
+export async function streamChatWithOpenAI(
+  messages: OpenAIMessage[],
+  { temperature = 0.7, maxTokens = 700 }: CompletionOptions = {},
+  onComplete?: (fullText: string) => void
+): Promise<ReadableStream<Uint8Array> | null> {
+  const res = await fetch("https://api.openai.com/v1/chat/completions", {
+    method: "POST",
+    headers: {
+      Authorization: `Bearer ${process.env.OPENAI_API_KEY}`,
+      "Content-Type": "application/json"
+    },
+    body: JSON.stringify({
+      model: "gpt-4o-mini",
+      temperature,
+      max_tokens: maxTokens,
+      stream: true,
+      messages
+    })
+  });
+
+  if (!res.ok || !res.body) {
+    console.error("OpenAI stream non-OK response:", res.status, res.statusText);
+    return null;
+  }
+
+  const upstream = res.body;
+  const decoder = new TextDecoder();
+  const encoder = new TextEncoder();
+  const reader = upstream.getReader();
+
+  let buffer = "";
+  let fullText = "";
+  let settled = false;
+
+  // Tek noktadan raporlama: ancak akış sonuna kadar okunmuşsa metin
+  // başarı sayılır; hata/iptalde boş string geçilir (= başarısız)
+  const settle = (ok: boolean) => {
+    if (settled) return;
+    settled = true;
+    onComplete?.(ok ? fullText : "");
+  };
+
+  return new ReadableStream<Uint8Array>({
+    async start(controller) {
+      try {
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          // SSE event'leri boş satırla ayrılır; son parça eksik kalabilir
+          const events = buffer.split("\n\n");
+          buffer = events.pop() ?? "";
+          for (const evt of events) {
+            for (const line of evt.split("\n")) {
+              if (!line.startsWith("data: ")) continue;
+              const payload = line.slice(6).trim();
+              if (payload === "[DONE]") continue;
+              try {
+                const delta = JSON.parse(payload)?.choices?.[0]?.delta?.content;
+                if (delta) {
+                  fullText += delta;
+                  controller.enqueue(encoder.encode(delta));
+                }
+              } catch {
+                // bozuk/kısmi event — atla
+              }
+            }
+          }
+        }
+        settle(true);
+      } catch (err) {
+        // Upstream okuma hatası veya iptal sonrası enqueue — yarım metin
+        console.error("OpenAI stream read error:", err);
+        settle(false);
+      } finally {
+        try {
+          controller.close();
+        } catch {
+          // iptal edilmiş stream'de close atar — önemsiz
+        }
+      }
+    },
+    cancel(reason) {
+      // Client akışı bıraktı (sekme kapandı vb.) — upstream reader'ı
+      // serbest bırak, biriken metni başarı sayma
+      settle(false);
+      reader.cancel(reason).catch(() => {});
+    },
+  });
+}
+
+export async function chatWithOpenAI(
+  messages: OpenAIMessage[],
+  { temperature = 0.7, maxTokens = 700 }: CompletionOptions = {}
+): Promise<string | null> {
+  const res = await fetch("https://api.openai.com/v1/chat/completions", {
+    method: "POST",
+    headers: {
+      Authorization: `Bearer ${process.env.OPENAI_API_KEY}`,
+      "Content-Type": "application/json"
+    },
+    body: JSON.stringify({
+      model: "gpt-4o-mini",
+      temperature,
+      max_tokens: maxTokens,
+      messages
+    })
+  });
+
+  if (!res.ok) {
+    console.error("OpenAI non-OK response:", res.status, res.statusText);
+    return null;
+  }
+
+  try {
+    const data = await res.json();
+    return data?.choices?.[0]?.message?.content ?? null;
+  } catch {
+    console.error("OpenAI JSON parse error, status:", res.status);
+    return null;
+  }
+}
@@ -1,6 +1,9 @@
 import chunks from "../data/orhan.chunks.json";
 import embeddings from "../data/orhan.embeddings.json";
 
+import { TtlLruCache } from "./cache";
+import { KeywordMatcher } from "./keywordMatcher";
+
 type Chunk = {
   id: string;
   topic: string;
@@ -13,22 +16,49 @@ type EmbeddingEntry = {
   vector: number[];
 };
 
-// Cosine similarity hesapla
-function cosineSimilarity(a: number[], b: number[]): number {
-  let dot = 0, normA = 0, normB = 0;
-  for (let i = 0; i < a.length; i++) {
-    dot += a[i] * b[i];
-    normA += a[i] * a[i];
-    normB += b[i] * b[i];
-  }
-  return dot / (Math.sqrt(normA) * Math.sqrt(normB));
+// Vektörü birim norma çek (Float32Array kopyası döner)
+function normalizeVector(v: number[]): Float32Array {
+  let norm = 0;
+  for (let i = 0; i < v.length; i++) norm += v[i] * v[i];
+  norm = Math.sqrt(norm) || 1;
+  const out = new Float32Array(v.length);
+  for (let i = 0; i < v.length; i++) out[i] = v[i] / norm;
+  return out;
+}
+
+// Chunk vektörleri vektör başına ayrı array yerine tek bitişik float32
+// buffer'da satır satır tutulur — tek allocation, cache-friendly tarama.
+// Satırlar baştan birim normlu: cosine similarity sorgu başına düz dot
+// product'a iner (norm hesabı tekrar edilmez).
+const EMBED_ENTRIES = embeddings as EmbeddingEntry[];
+const EMBED_DIM = EMBED_ENTRIES.length > 0 ? EMBED_ENTRIES[0].vector.length : 0;
+const embeddingIds = EMBED_ENTRIES.map((e) => e.id);
+const embeddingMatrix = new Float32Array(EMBED_ENTRIES.length * EMBED_DIM);
+for (let row = 0; row < EMBED_ENTRIES.length; row++) {
+  const v = EMBED_ENTRIES[row].vector;
+  let norm = 0;
+  for (let i = 0; i < v.length; i++) norm += v[i] * v[i];
+  norm = Math.sqrt(norm) || 1;
+  const base = row * EMBED_DIM;
+  for (let i = 0; i < v.length; i++) embeddingMatrix[base + i] = v[i] / norm;
 }
 
+const chunkById = new Map<string, Chunk>(
+  (chunks as Chunk[]).map((c) => [c.id, c])
+);
+
+// Sorgu embedding cache'i — aynı soru (farklı ziyaretçiden de gelse)
+// tekrar tekrar embed edilmesin
+const embedCache = new TtlLruCache<number[]>(300, 30 * 60 * 1000);
+
 // Sorguyu OpenAI ile embed et
-async function embedQuery(query: string): Promise<number[] | null> {
+export async function embedQuery(query: string): Promise<number[] | null> {
   const apiKey = process.env.OPENAI_API_KEY;
   if (!apiKey) return null;
 
+  const cached = embedCache.get(query);
+  if (cached) return cached;
+
   try {
     const res = await fetch("https://api.openai.com/v1/embeddings", {
       method: "POST",
@@ -42,30 +72,55 @@ async function embedQuery(query: string): Promise<number[] | null> {
       }),
     });
     const data = await res.json();
-    return data?.data?.[0]?.embedding ?? null;
+    const embedding = data?.data?.[0]?.embedding ?? null;
+    if (embedding) embedCache.set(query, embedding);
+    return embedding;
   } catch {
     return null;
   }
 }
 
+// Hot path regexleri modül seviyesinde — literal regex her değerlendirmede
+// yeni RegExp objesi üretir, desen bir kez yaratılıp paylaşılır
+const WHITESPACE_RE = /\s+/;
+const TRAILING_PUNCT_RE = /[!?.,\s]+$/;
+
+// Keyword fallback'in chunk başına türettiği alanlar bir kez hesaplanır
+// (istek başına toLowerCase + split tekrarı yerine)
+const keywordIndex = (chunks as Chunk[]).map((chunk) => ({
+  chunk,
+  topicTokens: chunk.topic.split(WHITESPACE_RE),
+  contentLower: chunk.content.toLowerCase(),
+}));
+
+// Tüm chunk keyword'leri ve topic token'ları için tek otomat: sorgu bir kez
+// taranır, chunk başına keyword başına includes döngüsü yerine set lookup kalır
+const KEYWORD_SCANNER = new KeywordMatcher([
+  ...new Set(
+    keywordIndex.flatMap(({ chunk, topicTokens }) => [
+      ...chunk.keywords,
+      ...topicTokens,
+    ])
+  ),
+]);
+
 // Keyword tabanlı fallback (embedding başarısız olursa)
 function keywordSearch(query: string, topK: number): Chunk[] {
   const q = query.toLowerCase();
-  const queryTokens = q.split(/\s+/).filter((t) => t.length > 2);
+  const queryTokens = q.split(WHITESPACE_RE).filter((t) => t.length > 2);
+  const hits = KEYWORD_SCANNER.allMatches(q);
 
-  const scored = (chunks as Chunk[]).map((chunk) => {
+  const scored = keywordIndex.map(({ chunk, topicTokens, contentLower }) => {
     let score = 0;
     for (const kw of chunk.keywords) {
-      if (q.includes(kw)) score += 3;
+      if (hits.has(kw)) score += 3;
       for (const token of queryTokens) {
         if (kw.includes(token) || token.includes(kw)) score += 1;
       }
     }
-    const topicTokens = chunk.topic.split(/\s+/);
     for (const tt of topicTokens) {
-      if (q.includes(tt)) score += 2;
+      if (hits.has(tt)) score += 2;
     }
-    const contentLower = chunk.content.toLowerCase();
     for (const token of queryTokens) {
       if (contentLower.includes(token)) score += 0.5;
     }
@@ -79,21 +134,72 @@ function keywordSearch(query: string, topK: number): Chunk[] {
     .map((s) => s.chunk);
 }
 
-// Ana retrieval fonksiyonu — önce semantic, fallback keyword
-export async function retrieveChunks(query: string, topK = 5): Promise<Chunk[]> {
-  const queryVector = await embedQuery(query);
+// Selamlama / smalltalk fast path — bu mesajlar için bilgi tabanından bağlam
+// gerekmez, embedding API çağrısını tamamen atla
+const SMALLTALK = new Set([
+  "selam", "selamlar", "merhaba", "mrb", "hey", "hi", "hello",
+  "naber", "nasılsın", "nasilsin", "günaydın", "iyi günler", "iyi akşamlar",
+  "teşekkürler", "teşekkür ederim", "sağol", "thanks", "thank you",
+  "ok", "tamam", "evet", "hayır", "yes", "no",
+]);
+
+// keyword → chunk doğrudan index'i: sorgu birebir bilinen bir keyword ise
+// ("kimsin", "maaş" gibi) embedding çağrısına hiç gerek yok
+const keywordToChunks = new Map<string, Chunk[]>();
+for (const chunk of chunks as Chunk[]) {
+  for (const kw of chunk.keywords) {
+    const key = kw.toLowerCase();
+    const list = keywordToChunks.get(key);
+    if (list) list.push(chunk);
+    else keywordToChunks.set(key, [chunk]);
+  }
+}
+
+function normalizeQuery(query: string): string {
+  return query.toLowerCase().replace(TRAILING_PUNCT_RE, "").trim();
+}
+
+export function isSmalltalk(query: string): boolean {
+  return SMALLTALK.has(normalizeQuery(query));
+}
+
+// Sorgu embedding gerektirmeden cevaplanabilir mi? (birebir keyword eşleşmesi)
+export function hasKeywordShortcut(query: string): boolean {
+  return keywordToChunks.has(normalizeQuery(query));
+}
+
+// Ana retrieval fonksiyonu — önce semantic, fallback keyword.
+// Sorgu vektörü dışarıda zaten çıkarıldıysa parametreyle verilebilir
+// (null = embedding denendi ama başarısız; tekrar denenmez).
+export async function retrieveChunks(
+  query: string,
+  topK = 5,
+  precomputedVector?: number[] | null
+): Promise<Chunk[]> {
+  if (isSmalltalk(query)) return [];
+
+  // Sorgu birebir bir chunk keyword'ü ise doğrudan eşleştir — sıfır API çağrısı
+  const direct = keywordToChunks.get(normalizeQuery(query));
+  if (direct) return direct.slice(0, topK);
+
+  const queryVector =
+    precomputedVector !== undefined ? precomputedVector : await embedQuery(query);
 
   if (queryVector) {
-    // Semantic search — cosine similarity
-    const embeddingMap = new Map<string, number[]>(
-      (embeddings as EmbeddingEntry[]).map((e) => [e.id, e.vector])
-    );
-
-    const scored = (chunks as Chunk[]).map((chunk) => {
-      const vec = embeddingMap.get(chunk.id);
-      const score = vec ? cosineSimilarity(queryVector, vec) : 0;
-      return { chunk, score };
-    });
+    // Semantic search — sorgu bir kez normalize edilir, matris satır satır
+    // taranır (satır başına offset'li dot product)
+    const q = normalizeVector(queryVector);
+    const scored: { chunk: Chunk; score: number }[] = [];
+    for (let row = 0; row < embeddingIds.length; row++) {
+      const chunk = chunkById.get(embeddingIds[row]);
+      if (!chunk) continue;
+      const base = row * EMBED_DIM;
+      let score = 0;
+      for (let i = 0; i < EMBED_DIM; i++) {
+        score += q[i] * embeddingMatrix[base + i];
+      }
+      scored.push({ chunk, score });
+    }
 
     return scored
       .sort((a, b) => b.score - a.score)
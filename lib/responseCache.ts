@@ -0,0 +1,91 @@
+/**
+ * In-memory cevap cache'i — aynı (normalize mesaj, dil) ikilisi kısa süre
+ * içinde tekrar gelirse OpenAI'ye hiç gitmeden cevap dönülür.
+ *
+ * Sadece yeni sohbetler için kullanılır; geçmişe ve uzun süreli hafızaya
+ * dayanan kişiselleştirilmiş cevaplar cache'e yazılmaz.
+ */
+
+import { TtlLruCache } from "./cache";
+
+const TTL_MS = 10 * 60 * 1000; // 10 dakika
+const MAX_ENTRIES = 200;
+
+const cache = new TtlLruCache<string>(MAX_ENTRIES, TTL_MS);
+
+const WHITESPACE_RE = /\s+/g;
+
+// Mesajı normalize et: lowercase + whitespace sadeleştirme
+export function normalizeMessage(message: string): string {
+  return message.toLowerCase().replace(WHITESPACE_RE, " ").trim();
+}
+
+export function responseCacheKey(message: string, lang: string): string {
+  return `${lang}:${normalizeMessage(message)}`;
+}
+
+export function getCachedAnswer(key: string): string | null {
+  return cache.get(key) ?? null;
+}
+
+export function setCachedAnswer(key: string, answer: string): void {
+  cache.set(key, answer);
+}
+
+// ── Semantik cache ────────────────────────────────────────────────────────
+// Exact match kaçırsa da anlamca aynı sorular ("ne iş yapıyorsun" vs
+// "mesleğin ne") aynı cevabı paylaşır. OpenAI embedding'leri birim normlu
+// geldiği için benzerlik düz dot product.
+
+type SemanticEntry = {
+  vector: number[];
+  answer: string;
+  lang: string;
+  expiresAt: number;
+};
+
+const SEMANTIC_THRESHOLD = 0.93;
+const SEMANTIC_MAX_ENTRIES = 100;
+
+const semanticCache: SemanticEntry[] = [];
+
+function dot(a: number[], b: number[]): number {
+  let sum = 0;
+  for (let i = 0; i < a.length; i++) sum += a[i] * b[i];
+  return sum;
+}
+
+// Sadece aynı cevap dilindeki girişler eşleşir — "ne iş yapıyorsun" ile
+// "what do you do" anlamca yakın ama cevapları farklı dilde olmalı
+export function getSemanticCachedAnswer(
+  queryVector: number[],
+  lang: string
+): string | null {
+  const now = Date.now();
+  for (let i = semanticCache.length - 1; i >= 0; i--) {
+    const entry = semanticCache[i];
+    if (entry.expiresAt < now) {
+      semanticCache.splice(i, 1);
+      continue;
+    }
+    if (entry.lang !== lang) continue;
+    if (dot(queryVector, entry.vector) >= SEMANTIC_THRESHOLD) {
+      return entry.answer;
+    }
+  }
+  return null;
+}
+
+export function setSemanticCachedAnswer(
+  queryVector: number[],
+  answer: string,
+  lang: string
+): void {
+  if (semanticCache.length >= SEMANTIC_MAX_ENTRIES) semanticCache.shift();
+  semanticCache.push({
+    vector: queryVector,
+    answer,
+    lang,
+    expiresAt: Date.now() + TTL_MS,
+  });
+}
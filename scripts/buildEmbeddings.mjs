@@ -24,7 +24,9 @@ if (!API_KEY) {
 
 const chunks = JSON.parse(readFileSync(CHUNKS_PATH, "utf-8"));
 
-async function embed(text) {
+// Tüm metinleri tek istekte embed et — chunk başına ayrı round trip yerine
+// API input olarak dizi kabul ediyor
+async function embedBatch(texts) {
   const res = await fetch("https://api.openai.com/v1/embeddings", {
     method: "POST",
     headers: {
@@ -33,34 +35,29 @@ async function embed(text) {
     },
     body: JSON.stringify({
       model: "text-embedding-3-small",
-      input: text,
+      input: texts,
     }),
   });
   const data = await res.json();
   if (data.error) throw new Error(data.error.message);
-  return data.data[0].embedding;
+  // Sıra garantisi için index'e göre dizili döndür
+  return data.data
+    .sort((a, b) => a.index - b.index)
+    .map((d) => d.embedding);
 }
 
-function cosineSimilarity(a, b) {
-  let dot = 0, normA = 0, normB = 0;
-  for (let i = 0; i < a.length; i++) {
-    dot += a[i] * b[i];
-    normA += a[i] * a[i];
-    normB += b[i] * b[i];
-  }
-  return dot / (Math.sqrt(normA) * Math.sqrt(normB));
-}
-
-console.log(`Embedding ${chunks.length} chunks...`);
+console.log(`Embedding ${chunks.length} chunks in one batch...`);
 
-const embeddings = [];
+const texts = chunks.map(
+  (chunk) => `${chunk.topic}\n${chunk.keywords.join(", ")}\n${chunk.content}`
+);
+const vectors = await embedBatch(texts);
 
-for (const chunk of chunks) {
-  const text = `${chunk.topic}\n${chunk.keywords.join(", ")}\n${chunk.content}`;
-  const vector = await embed(text);
-  embeddings.push({ id: chunk.id, vector });
+const embeddings = chunks.map((chunk, i) => {
   console.log(`✓ ${chunk.id}`);
-}
+  return { id: chunk.id, vector: vectors[i] };
+});
 
-writeFileSync(OUTPUT_PATH, JSON.stringify(embeddings, null, 2));
+// Kompakt yaz — pretty-print 1536 boyutlu vektörlerde dosyayı ~4x şişiriyor
+writeFileSync(OUTPUT_PATH, JSON.stringify(embeddings));
 console.log(`\nSaved ${embeddings.length} embeddings → ${OUTPUT_PATH}`);